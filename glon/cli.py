@@ -2,13 +2,16 @@
 CLI interface for glon package - Git Clone utility.
 """
 
+import io
 import os
 import sys
 import subprocess
 import argparse
 from pathlib import Path
-from typing import Optional, List
+from typing import Deque, Iterable, Iterator, Optional, List, Tuple
 import re
+from collections import deque
+from functools import lru_cache
 from datetime import datetime, timedelta
 
 # Try to import argcomplete for tab completion
@@ -20,6 +23,19 @@ except ImportError:
     ARGCOMPLETE_AVAILABLE = False
 
 
+# Accepted git URL forms, fused into a single pattern:
+#   git@github.com:owner/repo.git      (SSH, .git suffix required)
+#   https://github.com/owner/repo.git  (HTTPS)
+#   https://github.com/owner/repo      (HTTPS without .git)
+_GIT_URL_PATTERN = (
+    r'(?:git@[^:\n]+:(?=[^/\n]+/[^/\n]+\.git$)|https://[^/\n]+/)'
+    r'(?P<owner>[^/\n]+)/(?P<repo>[^/\n]+?)(?:\.git)?$'
+)
+_GIT_URL_RE = re.compile(_GIT_URL_PATTERN)
+# Same pattern anchored to each line, for scanning many URLs in one pass
+_GIT_URL_LINES_RE = re.compile('^' + _GIT_URL_PATTERN, re.MULTILINE)
+
+
 def get_all_projects(base_path: Optional[str] = None) -> List[str]:
     """
     Get all available projects in the base path.
@@ -166,6 +182,7 @@ def _clipboard_url_candidate(max_len: int = 200) -> Optional[str]:
     return text
 
 
+@lru_cache(maxsize=1024)
 def parse_git_url(url: str) -> Optional[tuple]:
     """
     Parse git URL and extract owner and repository name.
@@ -176,27 +193,44 @@ def parse_git_url(url: str) -> Optional[tuple]:
     Returns:
         Tuple of (owner, repo) or None if invalid
     """
-    # SSH format: git@github.com:owner/repo.git
-    ssh_pattern = r'git@[^:]+:([^/]+)/([^/]+)\.git$'
-    ssh_match = re.match(ssh_pattern, url)
-    if ssh_match:
-        return ssh_match.group(1), ssh_match.group(2)
-    
-    # HTTPS format: https://github.com/owner/repo.git
-    https_pattern = r'https://[^/]+/([^/]+)/([^/]+)\.git$'
-    https_match = re.match(https_pattern, url)
-    if https_match:
-        return https_match.group(1), https_match.group(2)
-    
-    # HTTPS format without .git: https://github.com/owner/repo
-    https_pattern_no_git = r'https://[^/]+/([^/]+)/([^/]+)$'
-    https_match_no_git = re.match(https_pattern_no_git, url)
-    if https_match_no_git:
-        return https_match_no_git.group(1), https_match_no_git.group(2)
+    match = _GIT_URL_RE.match(url)
+    if match:
+        return match.group('owner'), match.group('repo')
     
     return None
 
 
+def parse_git_urls(urls: Iterable[str]) -> Iterator[Optional[Tuple[str, str]]]:
+    """
+    Parse many git URLs in a single regex pass.
+    
+    Args:
+        urls: Git URLs (SSH or HTTPS), one per item
+        
+    Yields:
+        Tuple of (owner, repo), or None if invalid, for each URL in input order
+        
+    Raises:
+        ValueError: If a URL contains a newline
+    """
+    urls = list(urls)
+    if any("\n" in url for url in urls):
+        raise ValueError("Git URLs must not contain newlines")
+    
+    # Matches are anchored to line starts, so each one belongs to the URL
+    # whose line starts at the same offset
+    matches = _GIT_URL_LINES_RE.finditer("\n".join(urls))
+    match = next(matches, None)
+    offset = 0
+    for url in urls:
+        if match is not None and match.start() == offset:
+            yield match.group('owner'), match.group('repo')
+            match = next(matches, None)
+        else:
+            yield None
+        offset += len(url) + 1
+
+
 def create_directory_structure(owner: str, repo: str, base_path: Optional[str] = None) -> Path:
     """
     Create directory structure for the repository.
@@ -218,38 +252,59 @@ def create_directory_structure(owner: str, repo: str, base_path: Optional[str] =
     return target_dir
 
 
-def clone_repository(url: str, target_dir: Path) -> bool:
+def clone_repository(url: str, target_dir: Path, verbose: bool = False) -> bool:
     """
     Clone git repository to target directory.
     
+    Git's output is streamed rather than buffered, keeping only the last
+    lines for error reporting, so memory use stays flat for large clones.
+    
     Args:
         url: Git URL to clone
         target_dir: Target directory for cloning
+        verbose: Ask git for progress output and echo it to stderr
         
     Returns:
         True if successful, False otherwise
     """
     try:
         # Check if directory is empty
-        if any(target_dir.iterdir()):
-            print(f"Directory {target_dir} is not empty. Skipping clone.")
-            return False
+        with os.scandir(target_dir) as entries:
+            if next(entries, None) is not None:
+                print(f"Directory {target_dir} is not empty. Skipping clone.")
+                return False
         
         # Clone the repository
-        result = subprocess.run(
-            ["git", "clone", url, str(target_dir)],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        command = ["git", "clone", url, str(target_dir)]
+        if verbose:
+            # git only reports progress to a terminal unless asked to
+            command.insert(2, "--progress")
+        
+        error_tail: Deque[str] = deque(maxlen=50)
+        with subprocess.Popen(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        ) as process:
+            assert process.stderr is not None  # stderr=PIPE
+            # newline='' keeps the "\r" of git's in-place progress updates
+            with io.TextIOWrapper(process.stderr, errors="replace", newline="") as stderr:
+                for line in stderr:
+                    if verbose:
+                        sys.stderr.write(line)
+                    # Progress updates are noise in the error report
+                    if not line.endswith("\r"):
+                        error_tail.append(line)
+            returncode = process.wait()
+        
+        if returncode != 0:
+            print(f"Failed to clone repository: git exited with status {returncode}")
+            print(f"Error output: {''.join(error_tail)}")
+            return False
         
         print(f"Successfully cloned {url} to {target_dir}")
         return True
         
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to clone repository: {e}")
-        print(f"Error output: {e.stderr}")
-        return False
     except FileNotFoundError:
         print("Git is not installed or not in PATH")
         return False
@@ -303,7 +358,7 @@ def grab_from_clipboard(base_path: Optional[str] = None, dry_run: bool = False,
             print(f"Would clone {clipboard_text} to {target_dir}")
             return True
         
-        success = clone_repository(clipboard_text, target_dir)
+        success = clone_repository(clipboard_text, target_dir, verbose=verbose)
         
         if success:
             print(f"Repository ready at: {target_dir}")
@@ -343,9 +398,10 @@ def grab_from_clipboard(base_path: Optional[str] = None, dry_run: bool = False,
         return True
     
     # Check if target is empty
-    if any(target_dir.iterdir()):
-        print(f"Warning: Directory {target_dir} is not empty. Skipping.")
-        return False
+    with os.scandir(target_dir) as entries:
+        if next(entries, None) is not None:
+            print(f"Warning: Directory {target_dir} is not empty. Skipping.")
+            return False
     
     try:
         # Create symlink instead of copying
@@ -1043,7 +1099,7 @@ def main():
         return
     
     # Clone the repository
-    success = clone_repository(args.url, target_dir)
+    success = clone_repository(args.url, target_dir, verbose=args.verbose)
     
     if not success:
         return
@@ -3,18 +3,33 @@ Core garbage collection and memory management functionality.
 """
 
 import gc
-import sys
+import os
 import time
-from typing import Dict, List, Optional, Any
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any, Sequence, Union, overload
 import weakref
+from array import array
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover
+    psutil = None
 
 
 class GarbageCollector:
     """Enhanced garbage collector with monitoring and control features."""
     
-    def __init__(self):
-        self.stats_history = []
+    def __init__(self, history_size: int = 1024, detailed: bool = False):
+        """
+        Initialize the garbage collector wrapper.
+        
+        Args:
+            history_size: Maximum number of entries kept in stats_history
+            detailed: If True, also record 'objects_count' in each stats entry
+        """
+        self.stats_history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
         self.enabled = gc.isenabled()
+        self._detailed = detailed
     
     def enable(self) -> None:
         """Enable garbage collection."""
@@ -35,8 +50,14 @@ class GarbageCollector:
             
         Returns:
             Number of objects collected
+            
+        Raises:
+            ValueError: If generation is not 0, 1 or 2
         """
-        collected = gc.collect()
+        if generation not in (0, 1, 2):
+            raise ValueError(f"Invalid generation: {generation!r} (expected 0, 1 or 2)")
+        
+        collected = gc.collect(generation)
         self._record_stats()
         return collected
     
@@ -52,9 +73,21 @@ class GarbageCollector:
         """Set garbage collection threshold."""
         gc.set_threshold(*threshold)
     
-    def get_objects(self) -> List[Any]:
-        """Get all objects currently tracked by the garbage collector."""
-        return gc.get_objects()
+    def get_objects(self, generation: Optional[int] = None) -> List[Any]:
+        """
+        Get objects currently tracked by the garbage collector.
+        
+        Args:
+            generation: If given, only return objects in this generation
+                (0, 1 or 2). Young generations are far smaller than the
+                whole heap, so this is much cheaper than listing everything.
+            
+        Returns:
+            List of tracked objects
+        """
+        if generation is None:
+            return gc.get_objects()
+        return gc.get_objects(generation=generation)
     
     def get_referrers(self, obj: Any) -> List[Any]:
         """Get all objects that refer to the given object."""
@@ -69,9 +102,10 @@ class GarbageCollector:
         stats = {
             'timestamp': time.time(),
             'counts': self.get_count(),
-            'stats': self.get_stats(),
-            'objects_count': len(self.get_objects())
+            'stats': self.get_stats()
         }
+        if self._detailed:
+            stats['objects_count'] = len(self.get_objects())
         self.stats_history.append(stats)
     
     def get_memory_summary(self) -> Dict[str, Any]:
@@ -85,56 +119,123 @@ class GarbageCollector:
         }
 
 
+class _SnapshotView(Sequence[Dict[str, Any]]):
+    """Read-only view of a profiler's snapshots; items are built on access."""
+    
+    def __init__(self, profiler: "MemoryProfiler"):
+        self._profiler = profiler
+    
+    def __len__(self) -> int:
+        return self._profiler.snapshot_count
+    
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, Any]: ...
+    
+    @overload
+    def __getitem__(self, index: slice) -> List[Dict[str, Any]]: ...
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(index, slice):
+            return [self._profiler._snapshot_dict(i) for i in range(*index.indices(len(self)))]
+        return self._profiler._snapshot_dict(index)
+
+
 class MemoryProfiler:
     """Memory profiling and monitoring utilities."""
     
     def __init__(self):
-        self.snapshots = []
-        self.weak_refs = {}
+        # Snapshots are stored column-wise in typed arrays, one slot per field
+        self._snapshot_labels: List[str] = []
+        self._snapshot_columns = {
+            'timestamp': array('d'),
+            'rss': array('Q'),
+            'vms': array('Q'),
+            'objects_count': array('q'),  # -1 when not recorded
+            'gen0': array('q'),
+            'gen1': array('q'),
+            'gen2': array('q'),
+        }
+        # psutil.Process is bound to a PID; rebuilt in take_snapshot after a fork
+        self._pid = os.getpid()
+        self._process = psutil.Process(self._pid) if psutil is not None else None
+        # Snapshot timestamps are monotonic offsets from one wall-clock anchor
+        self._wall_anchor = time.time()
+        self._monotonic_anchor = time.monotonic()
+        # Tracked object metadata keyed by id(): (label, type name, created)
+        self._tracked: Dict[int, tuple] = {}
+        # Dead weakly-referenced objects drop out of this mapping on their own
+        self._weak_objects = weakref.WeakValueDictionary()
+        self._strong_objects: Dict[int, Any] = {}
     
-    def take_snapshot(self, label: str = "") -> Dict[str, Any]:
+    @property
+    def snapshots(self) -> Sequence[Dict[str, Any]]:
+        """Read-only sequence of stored snapshots; each is built when indexed."""
+        return _SnapshotView(self)
+    
+    @property
+    def snapshot_count(self) -> int:
+        """Number of stored snapshots."""
+        return len(self._snapshot_labels)
+    
+    def take_snapshot(self, label: str = "", detailed: bool = False) -> Dict[str, Any]:
         """
         Take a memory snapshot.
         
         Args:
             label: Optional label for the snapshot
+            detailed: If True, also record 'objects_count'
             
         Returns:
             Dictionary containing snapshot data
         """
-        try:
-            import psutil
-            import os
-            
-            process = psutil.Process(os.getpid())
-            memory_info = process.memory_info()
-            
-            snapshot = {
-                'label': label,
-                'timestamp': time.time(),
-                'rss': memory_info.rss,  # Resident Set Size
-                'vms': memory_info.vms,  # Virtual Memory Size
-                'objects_count': len(gc.get_objects()),
-                'gc_counts': gc.get_count()
-            }
-        except ImportError:
+        if self._process is not None:
+            if os.getpid() != self._pid:
+                self._pid = os.getpid()
+                self._process = psutil.Process(self._pid)
+            memory_info = self._process.memory_info()
+            rss, vms = memory_info.rss, memory_info.vms  # Resident / Virtual Memory Size
+        else:
             # Fallback when psutil is not available
-            snapshot = {
-                'label': label,
-                'timestamp': time.time(),
-                'rss': 0,
-                'vms': 0,
-                'objects_count': len(gc.get_objects()),
-                'gc_counts': gc.get_count()
-            }
+            rss, vms = 0, 0
         
-        self.snapshots.append(snapshot)
-        return snapshot
+        gen0, gen1, gen2 = gc.get_count()
+        columns = self._snapshot_columns
+        columns['timestamp'].append(
+            self._wall_anchor + (time.monotonic() - self._monotonic_anchor)
+        )
+        columns['rss'].append(rss)
+        columns['vms'].append(vms)
+        columns['objects_count'].append(len(gc.get_objects()) if detailed else -1)
+        columns['gen0'].append(gen0)
+        columns['gen1'].append(gen1)
+        columns['gen2'].append(gen2)
+        self._snapshot_labels.append(label)
+        
+        return self._snapshot_dict(len(self._snapshot_labels) - 1)
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Get all stored snapshots as a list of dictionaries."""
+        return [self._snapshot_dict(i) for i in range(len(self._snapshot_labels))]
     
-    def track_object(self, obj: Any, label: str = "") -> str:
+    def _snapshot_dict(self, index: int) -> Dict[str, Any]:
+        """Build the dictionary form of a stored snapshot."""
+        columns = self._snapshot_columns
+        objects_count = columns['objects_count'][index]
+        return {
+            'label': self._snapshot_labels[index],
+            'timestamp': columns['timestamp'][index],
+            'rss': columns['rss'][index],
+            'vms': columns['vms'][index],
+            'objects_count': objects_count if objects_count >= 0 else None,
+            'gc_counts': (columns['gen0'][index], columns['gen1'][index], columns['gen2'][index])
+        }
+    
+    def track_object(self, obj: Any, label: str = "") -> int:
         """
         Track an object using weak reference.
         
+        Objects that don't support weak references are held strongly.
+        
         Args:
             obj: Object to track
             label: Optional label for the object
@@ -142,46 +243,28 @@ class MemoryProfiler:
         Returns:
             Tracking ID
         """
-        obj_id = str(id(obj))
+        obj_id = id(obj)
         try:
-            ref = weakref.ref(obj)
-            ref_type = 'weak'
+            self._weak_objects[obj_id] = obj
         except TypeError:
-            ref = obj
-            ref_type = 'strong'
-
-        self.weak_refs[obj_id] = {
-            'ref': ref,
-            'ref_type': ref_type,
-            'label': label,
-            'type': type(obj).__name__,
-            'created': time.time()
-        }
+            self._strong_objects[obj_id] = obj
+        
+        self._tracked[obj_id] = (label, type(obj).__name__, time.time())
         return obj_id
     
-    def get_tracked_objects(self) -> Dict[str, Any]:
+    def get_tracked_objects(self) -> Dict[int, Any]:
         """Get information about tracked objects."""
-        alive = {}
-        for obj_id, info in self.weak_refs.items():
-            if info.get('ref_type') == 'weak':
-                obj = info['ref']()
-            else:
-                obj = info.get('ref')
-            if obj is not None:
-                alive[obj_id] = {
-                    'label': info['label'],
-                    'type': info['type'],
-                    'created': info['created'],
-                    'alive': True
-                }
-            else:
-                alive[obj_id] = {
-                    'label': info['label'],
-                    'type': info['type'],
-                    'created': info['created'],
-                    'alive': False
-                }
-        return alive
+        weak_objects = self._weak_objects
+        strong_objects = self._strong_objects
+        return {
+            obj_id: {
+                'label': label,
+                'type': type_name,
+                'created': created,
+                'alive': obj_id in weak_objects or obj_id in strong_objects
+            }
+            for obj_id, (label, type_name, created) in self._tracked.items()
+        }
     
     def compare_snapshots(self, index1: int, index2: int) -> Dict[str, Any]:
         """
@@ -194,25 +277,34 @@ class MemoryProfiler:
         Returns:
             Comparison data
         """
-        if index1 >= len(self.snapshots) or index2 >= len(self.snapshots):
+        count = len(self._snapshot_labels)
+        if not (-count <= index1 < count and -count <= index2 < count):
             raise IndexError("Snapshot index out of range")
         
-        snap1 = self.snapshots[index1]
-        snap2 = self.snapshots[index2]
+        columns = self._snapshot_columns
+        timestamps = columns['timestamp']
+        rss = columns['rss']
+        vms = columns['vms']
+        objects1 = columns['objects_count'][index1]
+        objects2 = columns['objects_count'][index2]
         
         return {
-            'time_diff': snap2['timestamp'] - snap1['timestamp'],
-            'rss_diff': snap2['rss'] - snap1['rss'],
-            'vms_diff': snap2['vms'] - snap1['vms'],
-            'objects_diff': snap2['objects_count'] - snap1['objects_count'],
-            'label1': snap1.get('label', f'Snapshot {index1}'),
-            'label2': snap2.get('label', f'Snapshot {index2}')
+            'time_diff': timestamps[index2] - timestamps[index1],
+            'rss_diff': rss[index2] - rss[index1],
+            'vms_diff': vms[index2] - vms[index1],
+            'objects_diff': objects2 - objects1 if objects1 >= 0 and objects2 >= 0 else None,
+            'label1': self._snapshot_labels[index1],
+            'label2': self._snapshot_labels[index2]
         }
     
     def clear_snapshots(self) -> None:
         """Clear all stored snapshots."""
-        self.snapshots.clear()
+        self._snapshot_labels.clear()
+        for column in self._snapshot_columns.values():
+            del column[:]
     
     def clear_tracking(self) -> None:
         """Clear all tracked objects."""
-        self.weak_refs.clear()
+        self._tracked.clear()
+        self._weak_objects.clear()
+        self._strong_objects.clear()
@@ -4,110 +4,172 @@ Utility functions for garbage collection and memory management.
 
 import gc
 import os
-import tempfile
-import shutil
 import time
-import sys
-from typing import List, Dict, Any, Optional, Callable
-import logging
+import weakref
+from collections import Counter
+from typing import TYPE_CHECKING, List, Dict, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    import logging
 
 try:
     import psutil
 except ImportError:  # pragma: no cover
     psutil = None
 
+_HAS_PSUTIL = psutil is not None
+
+# The PID never changes within a process, so one handle serves every call
+_PROCESS = psutil.Process(os.getpid()) if _HAS_PSUTIL else None
+
+
+def _reset_process() -> None:
+    """Re-create the cached process handle in a forked child."""
+    global _PROCESS
+    _PROCESS = psutil.Process(os.getpid())
+
+
+if _HAS_PSUTIL and hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_process)
+
 
 def cleanup_temp_files(pattern: str = "*") -> int:
     """
     Clean up temporary files matching a pattern.
     
     Args:
-        pattern: File pattern to match (default: "*")
+        pattern: Substring or glob pattern (``*``, ``?``, ``[...]``) to match
+            against file names (default: "*")
         
     Returns:
         Number of files cleaned up
     """
+    import fnmatch
+    import re
+    import tempfile
+    
     temp_dir = tempfile.gettempdir()
     cleaned_count = 0
     
+    # Pick the matcher once; both forms are compiled to a regex outside the loop
+    if any(ch in pattern for ch in "*?["):
+        matches = re.compile(fnmatch.translate(pattern)).match
+    else:
+        matches = re.compile(re.escape(pattern)).search
+    
+    dir_fd = None
     try:
-        for filename in os.listdir(temp_dir):
-            if pattern == "*" or pattern in filename:
-                file_path = os.path.join(temp_dir, filename)
+        # Unlink relative to an open directory fd to skip re-resolving the path
+        if os.unlink in os.supports_dir_fd:
+            dir_fd = os.open(temp_dir, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+        
+        with os.scandir(temp_dir) as entries:
+            for entry in entries:
+                if not matches(entry.name):
+                    continue
                 try:
-                    if os.path.isfile(file_path):
-                        os.remove(file_path)
+                    if entry.is_file(follow_symlinks=False):
+                        if dir_fd is not None:
+                            os.unlink(entry.name, dir_fd=dir_fd)
+                        else:
+                            os.unlink(entry.path)
                         cleaned_count += 1
                 except (PermissionError, OSError):
                     # Skip files we can't remove
                     continue
     except (PermissionError, OSError):
         pass
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
     
     return cleaned_count
 
 
-def monitor_memory_usage(duration: int = 60, interval: float = 1.0) -> List[Dict[str, Any]]:
+def monitor_memory_usage(duration: int = 60, interval: float = 1.0,
+                         detailed: bool = False) -> List[Dict[str, Any]]:
     """
     Monitor memory usage over time.
     
     Args:
         duration: Monitoring duration in seconds
         interval: Sampling interval in seconds
+        detailed: If True, also record 'objects_count' in each sample
         
     Returns:
         List of memory usage samples
+        
+    Raises:
+        ValueError: If interval is not positive
     """
-    if psutil is None:
+    if interval <= 0:
+        raise ValueError(f"Interval must be positive, got {interval}")
+    process = _PROCESS
+    if process is None:
         raise ImportError("psutil is required for memory monitoring. Install with: pip install psutil")
     
-    process = psutil.Process(psutil.os.getpid())
     samples = []
-    start_time = time.time()
+    # Schedule on the monotonic clock; timestamps are offsets from one
+    # wall-clock anchor so clock adjustments can't stretch or cut the run
+    start_wall = time.time()
+    start_time = time.monotonic()
+    i = 0
     
-    while time.time() - start_time < duration:
+    while i * interval < duration:
+        remaining = start_time + i * interval - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        
+        elapsed = time.monotonic() - start_time
+        if elapsed >= duration:
+            break
+        
         memory_info = process.memory_info()
         sample = {
-            'timestamp': time.time(),
+            'timestamp': start_wall + elapsed,
             'rss': memory_info.rss,
             'vms': memory_info.vms,
             'percent': process.memory_percent(),
-            'objects_count': len(gc.get_objects()),
             'gc_counts': gc.get_count()
         }
+        if detailed:
+            sample['objects_count'] = len(gc.get_objects())
         samples.append(sample)
-        time.sleep(interval)
+        
+        # Skip deadlines that passed while sampling instead of catching up
+        i = max(i + 1, int((time.monotonic() - start_time) / interval) + 1)
     
     return samples
 
 
-def force_garbage_collection(verbose: bool = False) -> Dict[str, int]:
+def force_garbage_collection(verbose: bool = False) -> Dict[str, Any]:
     """
     Force garbage collection on all generations.
     
     Args:
-        verbose: If True, print detailed information
+        verbose: If True, add a 'messages' list with one line per generation
         
     Returns:
-        Dictionary with collection results per generation
+        Dictionary with collection results per generation ('gen_0'..'gen_2')
+        plus overall 'before_count', 'after_count' and 'net_change'
     """
-    results = {}
+    results: Dict[str, Any] = {}
+    before_count = len(gc.get_objects())
     
     for generation in range(3):
-        before_count = len(gc.get_objects())
-        collected = gc.collect(generation)
-        after_count = len(gc.get_objects())
-        
-        results[f'gen_{generation}'] = {
-            'collected': collected,
-            'before_count': before_count,
-            'after_count': after_count,
-            'net_change': after_count - before_count
-        }
-        
-        if verbose:
-            print(f"Generation {generation}: Collected {collected} objects, "
-                  f"Net change: {after_count - before_count}")
+        results[f'gen_{generation}'] = {'collected': gc.collect(generation)}
+    
+    after_count = len(gc.get_objects())
+    results['before_count'] = before_count
+    results['after_count'] = after_count
+    results['net_change'] = after_count - before_count
+    
+    if verbose:
+        results['messages'] = [
+            f"Generation {generation}: Collected "
+            f"{results[f'gen_{generation}']['collected']} objects"
+            for generation in range(3)
+        ]
     
     return results
 
@@ -116,44 +178,108 @@ def find_object_cycles(obj: Any, max_depth: int = 10) -> List[List[Any]]:
     """
     Find reference cycles involving the given object.
     
+    A breadth-first pass first collects the objects within ``max_depth``
+    levels of ``obj``; an iterative Tarjan strongly-connected-components walk
+    over ``gc.get_referents`` then expands only those, so the result doesn't
+    depend on the order in which referents are visited. Visited objects are
+    tracked by id() and held through weak references where possible, so
+    finished acyclic parts of the graph aren't pinned.
+    
     Args:
         obj: Object to analyze
-        max_depth: Maximum search depth
+        max_depth: Number of reference levels below ``obj`` whose referents
+            are followed (a two-object cycle is found at ``max_depth=1``)
         
     Returns:
-        List of reference cycles found
+        List of reference cycles found (each a list of the objects in the cycle)
     """
     cycles = []
-    visited = set()
-    path = []
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    scc_ids = []
+    # (reference, is_weak) for each entry in scc_ids; objects that don't
+    # support weak references fall back to a strong reference
+    scc_refs = []
+    self_loops = set()
     
-    def _find_cycles(current_obj, depth):
-        if depth > max_depth:
-            return
-        
-        obj_id = id(current_obj)
-        if obj_id in visited:
-            if current_obj in path:
-                # Found a cycle
-                cycle_start = path.index(current_obj)
-                cycles.append(path[cycle_start:] + [current_obj])
-            return
-        
-        visited.add(obj_id)
-        path.append(current_obj)
-        
+    def _referents(current_obj):
         try:
-            referents = gc.get_referents(current_obj)
-            for ref in referents:
-                _find_cycles(ref, depth + 1)
-        except:
+            return gc.get_referents(current_obj)
+        except Exception:
             # Skip objects that can't be analyzed
-            pass
-        
-        path.pop()
-        visited.remove(obj_id)
+            return ()
+    
+    def _push(current_obj, current_id):
+        scc_ids.append(current_id)
+        on_stack.add(current_id)
+        try:
+            scc_refs.append((weakref.ref(current_obj), True))
+        except TypeError:
+            scc_refs.append((current_obj, False))
+    
+    # Objects at most max_depth levels from obj, by shortest distance; only
+    # these have their referents walked
+    expand = set()
+    root_id = id(obj)
+    if max_depth >= 0:
+        expand.add(root_id)
+        level = [obj]
+        for _ in range(max_depth):
+            next_level = []
+            for current_obj in level:
+                for ref in _referents(current_obj):
+                    ref_id = id(ref)
+                    if ref_id not in expand:
+                        expand.add(ref_id)
+                        next_level.append(ref)
+            level = next_level
+    
+    index[root_id] = lowlink[root_id] = 0
+    counter = 1
+    _push(obj, root_id)
+    work = [(root_id, iter(_referents(obj) if root_id in expand else ()))]
+    
+    while work:
+        node_id, referents = work[-1]
+        for ref in referents:
+            ref_id = id(ref)
+            if ref_id not in index:
+                index[ref_id] = lowlink[ref_id] = counter
+                counter += 1
+                _push(ref, ref_id)
+                children = _referents(ref) if ref_id in expand else ()
+                work.append((ref_id, iter(children)))
+                break
+            if ref_id in on_stack:
+                if ref_id == node_id:
+                    self_loops.add(node_id)
+                if index[ref_id] < lowlink[node_id]:
+                    lowlink[node_id] = index[ref_id]
+        else:
+            work.pop()
+            if work:
+                parent_id = work[-1][0]
+                if lowlink[node_id] < lowlink[parent_id]:
+                    lowlink[parent_id] = lowlink[node_id]
+            
+            if lowlink[node_id] == index[node_id]:
+                component = []
+                size = 0
+                while True:
+                    member_id = scc_ids.pop()
+                    member_ref, is_weak = scc_refs.pop()
+                    on_stack.discard(member_id)
+                    size += 1
+                    member = member_ref() if is_weak else member_ref
+                    if member is not None:
+                        component.append(member)
+                    if member_id == node_id:
+                        break
+                if (size > 1 or node_id in self_loops) and component:
+                    component.reverse()
+                    cycles.append(component)
     
-    _find_cycles(obj, 0)
     return cycles
 
 
@@ -181,21 +307,22 @@ def analyze_memory_usage() -> Dict[str, Any]:
     Returns:
         Dictionary with memory analysis
     """
-    if psutil is None:
+    process = _PROCESS
+    if process is None:
         raise ImportError("psutil is required for memory analysis. Install with: pip install psutil")
     
-    process = psutil.Process(psutil.os.getpid())
     memory_info = process.memory_info()
     
     # Analyze object types
     all_objects = gc.get_objects()
-    type_counts = {}
-    for obj in all_objects:
-        obj_type = type(obj).__name__
-        type_counts[obj_type] = type_counts.get(obj_type, 0) + 1
+    # Tally type objects with map() so the per-object loop stays in C, then
+    # fold into names once per distinct type (distinct types may share a name)
+    type_counts = Counter()
+    for obj_type, count in Counter(map(type, all_objects)).items():
+        type_counts[obj_type.__name__] += count
     
     # Get top 10 most common types
-    sorted_types = sorted(type_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    sorted_types = type_counts.most_common(10)
     
     return {
         'timestamp': time.time(),
@@ -232,7 +359,7 @@ def clear_gc_debug() -> None:
     gc.set_debug(0)
 
 
-def create_memory_logger(log_file: str = "gc_memory.log") -> logging.Logger:
+def create_memory_logger(log_file: str = "gc_memory.log") -> "logging.Logger":
     """
     Create a logger for memory-related events.
     
@@ -242,9 +369,16 @@ def create_memory_logger(log_file: str = "gc_memory.log") -> logging.Logger:
     Returns:
         Configured logger instance
     """
+    import logging
+    
     logger = logging.getLogger("gc_memory")
     logger.setLevel(logging.INFO)
     
+    # Only open a log file if it will actually be attached; an unused
+    # FileHandler would leak its open file
+    if logger.handlers:
+        return logger
+    
     # Create file handler
     handler = logging.FileHandler(log_file)
     handler.setLevel(logging.INFO)
@@ -256,7 +390,6 @@ def create_memory_logger(log_file: str = "gc_memory.log") -> logging.Logger:
     handler.setFormatter(formatter)
     
     # Add handler to logger
-    if not logger.handlers:
-        logger.addHandler(handler)
+    logger.addHandler(handler)
     
     return logger
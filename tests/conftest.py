@@ -0,0 +1,58 @@
+"""
+Shared pytest fixtures.
+"""
+
+import gc
+from collections import namedtuple
+from unittest.mock import MagicMock
+
+import pytest
+
+# Plain value object standing in for psutil's memory_info() result
+MemoryInfo = namedtuple("MemoryInfo", "rss vms")
+
+
+@pytest.fixture(scope="module")
+def gc_wrapper():
+    """Single GarbageCollector shared by the tests of a module."""
+    from glon.core import GarbageCollector
+    
+    return GarbageCollector()
+
+
+@pytest.fixture(scope="class")
+def shared_profiler():
+    """Single MemoryProfiler shared by the tests of a class."""
+    from glon.core import MemoryProfiler
+    
+    return MemoryProfiler()
+
+
+@pytest.fixture
+def profiler(shared_profiler):
+    """The shared MemoryProfiler, emptied before each test."""
+    shared_profiler.clear_snapshots()
+    shared_profiler.clear_tracking()
+    return shared_profiler
+
+
+@pytest.fixture
+def restore_gc_state(gc_wrapper):
+    """Restore the interpreter's gc enabled state and thresholds after a test."""
+    enabled = gc.isenabled()
+    threshold = gc.get_threshold()
+    yield
+    gc.set_threshold(*threshold)
+    if enabled:
+        gc_wrapper.enable()
+    else:
+        gc_wrapper.disable()
+
+
+@pytest.fixture(scope="session")
+def psutil_process_mock():
+    """Stand-in for the cached psutil.Process used by glon.utils."""
+    process = MagicMock()
+    process.memory_info.return_value = MemoryInfo(rss=1000000, vms=2000000)
+    process.memory_percent.return_value = 50.0
+    return process
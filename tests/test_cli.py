@@ -3,12 +3,13 @@ Tests for CLI functionality.
 """
 
 import pytest
+import io
 import subprocess
 import tempfile
 import os
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from pathlib import Path
-from glon.cli import parse_git_url, create_directory_structure, clone_repository
+from glon.cli import parse_git_url, parse_git_urls, create_directory_structure, clone_repository
 
 
 class TestParseGitUrl:
@@ -56,6 +57,68 @@ class TestParseGitUrl:
         
         assert result == ("user", "project")
 
+    def test_parse_ssh_url_without_git(self):
+        """Test that SSH URLs require the .git extension."""
+        url = "git@github.com:tom-sapletta-com/glon"
+        result = parse_git_url(url)
+
+        assert result is None
+
+
+class TestParseGitUrls:
+    """Test cases for bulk URL parsing."""
+    
+    def test_parse_git_urls(self):
+        """Test parsing several URLs at once."""
+        urls = [
+            "git@github.com:owner/first.git",
+            "https://github.com/owner/second.git",
+            "https://gitlab.com/user/third",
+        ]
+        
+        assert list(parse_git_urls(urls)) == [
+            ("owner", "first"),
+            ("owner", "second"),
+            ("user", "third"),
+        ]
+    
+    def test_parse_git_urls_invalid(self):
+        """Test that invalid URLs yield None in their own position."""
+        urls = [
+            "invalid-url",
+            "git@github.com:owner/no-suffix",
+            "https://github.com/owner/repo.git",
+            "",
+            "https://gitlab.com/user/last",
+        ]
+        
+        assert list(parse_git_urls(urls)) == [
+            None,
+            None,
+            ("owner", "repo"),
+            None,
+            ("user", "last"),
+        ]
+    
+    def test_parse_git_urls_rejects_newlines(self):
+        """Test that an item spanning several lines is rejected."""
+        urls = ["https://github.com/owner/one\nhttps://github.com/owner/two"]
+        
+        with pytest.raises(ValueError):
+            list(parse_git_urls(urls))
+    
+    def test_parse_git_urls_matches_single_parser(self):
+        """Test that bulk parsing agrees with parse_git_url."""
+        urls = [
+            "git@github.com:tom-sapletta-com/glon.git",
+            "https://github.com/tom-sapletta-com/glon",
+            "https://github.com/a/b/c",
+            "invalid-url",
+            "git@github.com:owner/repo.git",
+        ]
+        
+        assert list(parse_git_urls(urls)) == [parse_git_url(url) for url in urls]
+
 
 class TestCreateDirectoryStructure:
     """Test cases for directory structure creation."""
@@ -99,14 +162,18 @@ class TestCreateDirectoryStructure:
 class TestCloneRepository:
     """Test cases for repository cloning."""
     
-    @patch('subprocess.run')
-    def test_clone_success(self, mock_run):
+    @staticmethod
+    def _mock_process(mock_popen, returncode=0, stderr=b""):
+        process = mock_popen.return_value
+        process.__enter__.return_value = process
+        process.stderr = io.BytesIO(stderr)
+        process.wait.return_value = returncode
+        return process
+    
+    @patch('subprocess.Popen')
+    def test_clone_success(self, mock_popen):
         """Test successful repository cloning."""
-        mock_run.return_value = MagicMock(
-            returncode=0,
-            stdout="Cloning into 'target'...",
-            stderr=""
-        )
+        self._mock_process(mock_popen, stderr=b"Cloning into 'target'...\n")
         
         with tempfile.TemporaryDirectory() as temp_dir:
             target_dir = Path(temp_dir) / "target"
@@ -116,18 +183,36 @@ class TestCloneRepository:
             result = clone_repository(url, target_dir)
             
             assert result is True
-            mock_run.assert_called_once_with(
+            mock_popen.assert_called_once_with(
                 ["git", "clone", url, str(target_dir)],
-                capture_output=True,
-                text=True,
-                check=True
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
             )
     
-    @patch('subprocess.run')
-    def test_clone_git_error(self, mock_run):
+    @pytest.mark.parametrize("verbose", [False, True])
+    @patch('subprocess.Popen')
+    def test_clone_progress_only_when_verbose(self, mock_popen, verbose):
+        """Test that git is asked for progress output only in verbose mode."""
+        self._mock_process(mock_popen)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target_dir = Path(temp_dir) / "target"
+            target_dir.mkdir()
+            
+            url = "https://github.com/owner/repo.git"
+            with patch('sys.stderr'):
+                clone_repository(url, target_dir, verbose=verbose)
+            
+            argv = mock_popen.call_args[0][0]
+            assert ("--progress" in argv) is verbose
+            assert argv[-2:] == [url, str(target_dir)]
+    
+    @patch('subprocess.Popen')
+    def test_clone_git_error(self, mock_popen):
         """Test repository cloning with git error."""
-        mock_run.side_effect = subprocess.CalledProcessError(
-            1, "git", stderr="Repository not found"
+        self._mock_process(
+            mock_popen, returncode=128,
+            stderr=b"Receiving objects:  50%\rfatal: Repository not found\n"
         )
         
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -135,14 +220,38 @@ class TestCloneRepository:
             target_dir.mkdir()
             
             url = "https://github.com/owner/repo.git"
-            result = clone_repository(url, target_dir)
+            with patch('builtins.print') as mock_print, patch('sys.stderr'):
+                result = clone_repository(url, target_dir, verbose=True)
             
             assert result is False
+            mock_print.assert_any_call("Error output: fatal: Repository not found\n")
+    
+    @patch('subprocess.Popen')
+    def test_clone_verbose_streams_output(self, mock_popen):
+        """Test that verbose cloning echoes git output to stderr."""
+        self._mock_process(
+            mock_popen, stderr=b"Receiving objects:  50%\rReceiving objects: 100%\n"
+        )
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target_dir = Path(temp_dir) / "target"
+            target_dir.mkdir()
+            
+            url = "https://github.com/owner/repo.git"
+            with patch('sys.stderr') as mock_stderr:
+                result = clone_repository(url, target_dir, verbose=True)
+            
+            assert result is True
+            # In-place progress updates keep their carriage returns
+            assert mock_stderr.write.call_args_list == [
+                (("Receiving objects:  50%\r",),),
+                (("Receiving objects: 100%\n",),),
+            ]
     
-    @patch('subprocess.run')
-    def test_clone_git_not_found(self, mock_run):
+    @patch('subprocess.Popen')
+    def test_clone_git_not_found(self, mock_popen):
         """Test repository cloning when git is not found."""
-        mock_run.side_effect = FileNotFoundError()
+        mock_popen.side_effect = FileNotFoundError()
         
         with tempfile.TemporaryDirectory() as temp_dir:
             target_dir = Path(temp_dir) / "target"
@@ -4,108 +4,151 @@ Tests for core garbage collection functionality.
 
 import pytest
 import gc
-import time
-from glon.core import GarbageCollector, MemoryProfiler
+import sys
+import weakref
+from collections import deque
+from unittest.mock import patch
+from glon.core import GarbageCollector
+
+
+class _TestObj:
+    """Plain class whose instances support weak references."""
+
+
+class FakeClock:
+    """Clock that advances by a fixed step on every call."""
+    
+    def __init__(self, start: float = 1000.0, step: float = 1.0):
+        self.now = start
+        self.step = step
+    
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
 
 
 class TestGarbageCollector:
     """Test cases for GarbageCollector class."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.gc = GarbageCollector()
-    
-    def test_initialization(self):
+    def test_initialization(self, gc_wrapper):
         """Test GarbageCollector initialization."""
-        assert self.gc.enabled == gc.isenabled()
-        assert isinstance(self.gc.stats_history, list)
+        assert gc_wrapper.enabled == gc.isenabled()
+        assert isinstance(gc_wrapper.stats_history, deque)
+        assert gc_wrapper.stats_history.maxlen == 1024
     
-    def test_enable_disable(self):
-        """Test enabling and disabling garbage collection."""
-        original_state = gc.isenabled()
+    def test_stats_history_bounded(self):
+        """Test that stats history keeps only the most recent entries."""
+        collector = GarbageCollector(history_size=2)
+        for _ in range(3):
+            collector.collect(0)
         
-        self.gc.enable()
-        assert gc.isenabled() is True
-        assert self.gc.enabled is True
+        assert len(collector.stats_history) == 2
+        assert 'objects_count' not in collector.stats_history[-1]
+    
+    def test_stats_history_detailed(self):
+        """Test opting in to tracked-object counts in stats history."""
+        collector = GarbageCollector(detailed=True)
+        collector.collect(0)
         
-        self.gc.disable()
-        assert gc.isenabled() is False
-        assert self.gc.enabled is False
+        assert isinstance(collector.stats_history[-1]['objects_count'], int)
+    
+    @pytest.mark.usefixtures("restore_gc_state")
+    def test_enable_disable(self, gc_wrapper):
+        """Test enabling and disabling garbage collection."""
+        gc_wrapper.enable()
+        enabled = gc.isenabled()
+        assert enabled is True
+        assert gc_wrapper.enabled is enabled
         
-        # Restore original state
-        if original_state:
-            gc.enable()
+        gc_wrapper.disable()
+        enabled = gc.isenabled()
+        assert enabled is False
+        assert gc_wrapper.enabled is enabled
     
-    def test_collect(self):
+    def test_collect(self, gc_wrapper):
         """Test garbage collection."""
-        # Create some objects to collect
-        objects = [[] for _ in range(100)]
+        # Create an unreachable two-node cycle for the collector to find
+        a = []
+        b = [a]
+        a.append(b)
+        del a, b
         
-        collected = self.gc.collect()
+        collected = gc_wrapper.collect()
         assert isinstance(collected, int)
-        assert collected >= 0
+        assert collected >= 2
         
         # Check that stats were recorded
-        assert len(self.gc.stats_history) > 0
+        assert len(gc_wrapper.stats_history) > 0
     
-    def test_get_stats(self):
+    def test_collect_generation(self, gc_wrapper):
+        """Test collecting a single generation."""
+        for generation in (0, 1, 2):
+            assert gc_wrapper.collect(generation) >= 0
+    
+    def test_collect_invalid_generation(self, gc_wrapper):
+        """Test collecting an invalid generation."""
+        with pytest.raises(ValueError):
+            gc_wrapper.collect(3)
+    
+    def test_get_stats(self, gc_wrapper):
         """Test getting garbage collection statistics."""
-        stats = self.gc.get_stats()
+        stats = gc_wrapper.get_stats()
         assert isinstance(stats, list)
         assert len(stats) == 3  # Three generations
     
-    def test_get_count(self):
+    def test_get_count(self, gc_wrapper):
         """Test getting garbage collection counts."""
-        counts = self.gc.get_count()
+        counts = gc_wrapper.get_count()
         assert isinstance(counts, tuple)
         assert len(counts) == 3  # Three generations
     
-    def test_set_threshold(self):
+    @pytest.mark.usefixtures("restore_gc_state")
+    def test_set_threshold(self, gc_wrapper):
         """Test setting garbage collection threshold."""
-        original_threshold = gc.get_threshold()
-        
-        self.gc.set_threshold((700, 10, 10))
+        gc_wrapper.set_threshold((700, 10, 10))
         assert gc.get_threshold() == (700, 10, 10)
-        
-        # Restore original threshold
-        gc.set_threshold(*original_threshold)
     
-    def test_get_objects(self):
+    @pytest.mark.usefixtures("restore_gc_state")
+    def test_get_objects(self, gc_wrapper):
         """Test getting tracked objects."""
-        objects = self.gc.get_objects()
+        # Keep the new object in generation 0 while we look for it
+        gc_wrapper.disable()
+        young = []
+        
+        objects = gc_wrapper.get_objects(generation=0)
         assert isinstance(objects, list)
-        assert len(objects) > 0
+        assert any(obj is young for obj in objects)
     
-    def test_get_memory_summary(self):
+    def test_get_memory_summary(self, gc_wrapper):
         """Test getting memory summary."""
-        summary = self.gc.get_memory_summary()
+        # Snapshot gc state once; the summary must report the same values
+        enabled = gc.isenabled()
+        threshold = gc.get_threshold()
+        summary = gc_wrapper.get_memory_summary()
+        assert summary['enabled'] == enabled
+        assert summary['threshold'] == threshold
         
-        required_keys = ['enabled', 'counts', 'stats', 'objects_tracked', 'threshold']
-        for key in required_keys:
-            assert key in summary
-        
-        assert isinstance(summary['enabled'], bool)
-        assert isinstance(summary['counts'], tuple)
-        assert isinstance(summary['stats'], list)
-        assert isinstance(summary['objects_tracked'], int)
-        assert isinstance(summary['threshold'], tuple)
+        expected = {
+            'enabled': bool,
+            'counts': tuple,
+            'stats': list,
+            'objects_tracked': int,
+            'threshold': tuple
+        }
+        assert {key: type(summary[key]) for key in expected} == expected
 
 
 class TestMemoryProfiler:
     """Test cases for MemoryProfiler class."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.profiler = MemoryProfiler()
-    
-    def test_initialization(self):
+    def test_initialization(self, profiler):
         """Test MemoryProfiler initialization."""
-        assert isinstance(self.profiler.snapshots, list)
-        assert isinstance(self.profiler.weak_refs, dict)
+        assert profiler.snapshot_count == 0
+        assert profiler.get_tracked_objects() == {}
     
-    def test_take_snapshot(self):
+    def test_take_snapshot(self, profiler):
         """Test taking memory snapshots."""
-        snapshot = self.profiler.take_snapshot("test")
+        snapshot = profiler.take_snapshot("test")
         
         required_keys = ['label', 'timestamp', 'rss', 'vms', 'objects_count', 'gc_counts']
         for key in required_keys:
@@ -115,53 +158,100 @@ class TestMemoryProfiler:
         assert isinstance(snapshot['timestamp'], float)
         assert isinstance(snapshot['rss'], int)
         assert isinstance(snapshot['vms'], int)
-        assert isinstance(snapshot['objects_count'], int)
+        assert snapshot['objects_count'] is None
         assert isinstance(snapshot['gc_counts'], tuple)
         
         # Check that snapshot was stored
-        assert len(self.profiler.snapshots) == 1
+        assert profiler.snapshot_count == 1
+        assert profiler.to_dicts() == [snapshot]
     
-    def test_track_object(self):
+    def test_snapshots_view(self, profiler):
+        """Test the read-only snapshots sequence."""
+        first = profiler.take_snapshot("first")
+        second = profiler.take_snapshot("second")
+        
+        assert len(profiler.snapshots) == 2
+        assert profiler.snapshots[0] == first
+        assert profiler.snapshots[-1] == second
+        assert profiler.snapshots[1:] == [second]
+        assert list(profiler.snapshots) == [first, second]
+        with pytest.raises(IndexError):
+            profiler.snapshots[2]
+        assert not hasattr(profiler.snapshots, "append")
+    
+    def test_take_snapshot_after_fork(self, psutil_process_mock, monkeypatch):
+        """Test that the process handle follows a PID change."""
+        from glon.core import MemoryProfiler
+        
+        profiler = MemoryProfiler()
+        stale_process = profiler._process
+        monkeypatch.setattr("glon.core.os.getpid", lambda: profiler._pid + 1)
+        with patch("glon.core.psutil.Process", return_value=psutil_process_mock) as mock_process_cls:
+            snapshot = profiler.take_snapshot()
+        
+        mock_process_cls.assert_called_once_with(profiler._pid)
+        assert profiler._process is psutil_process_mock
+        assert profiler._process is not stale_process
+        assert snapshot['rss'] == 1000000
+    
+    def test_take_snapshot_detailed(self, profiler):
+        """Test taking a snapshot that counts tracked objects."""
+        snapshot = profiler.take_snapshot("test", detailed=True)
+        
+        assert isinstance(snapshot['objects_count'], int)
+        assert snapshot['objects_count'] > 0
+    
+    def test_track_object(self, profiler):
         """Test object tracking."""
-        class TestObject:
-            pass
+        test_obj = _TestObj()  # Use custom class for weak reference
+        tracking_id = profiler.track_object(test_obj, "test_object")
         
-        test_obj = TestObject()  # Use custom class for weak reference
-        tracking_id = self.profiler.track_object(test_obj, "test_object")
+        tracked = profiler.get_tracked_objects()
+        assert tracking_id == id(test_obj)
+        assert tracked[tracking_id]['label'] == "test_object"
+        assert tracked[tracking_id]['type'] == "_TestObj"
+    
+    def test_track_object_without_weakref_support(self, profiler):
+        """Test tracking an object that can't be weakly referenced."""
+        test_obj = [1, 2, 3]
+        tracking_id = profiler.track_object(test_obj, "test_list")
         
-        assert tracking_id in self.profiler.weak_refs
-        assert self.profiler.weak_refs[tracking_id]['label'] == "test_object"
-        assert self.profiler.weak_refs[tracking_id]['type'] == "TestObject"
+        tracked = profiler.get_tracked_objects()
+        assert tracked[tracking_id]['type'] == "list"
+        assert tracked[tracking_id]['alive'] is True
     
-    def test_get_tracked_objects(self):
+    def test_get_tracked_objects(self, profiler):
         """Test getting tracked objects information."""
-        class TestObject:
-            pass
-        
-        test_obj = TestObject()  # Use custom class for weak reference
-        tracking_id = self.profiler.track_object(test_obj, "test_object")
+        test_obj = _TestObj()  # Use custom class for weak reference
+        tracking_id = profiler.track_object(test_obj, "test_object")
         
-        tracked = self.profiler.get_tracked_objects()
+        tracked = profiler.get_tracked_objects()
         assert tracking_id in tracked
         assert tracked[tracking_id]['alive'] is True
         assert tracked[tracking_id]['label'] == "test_object"
         
-        # Delete object and check it's marked as not alive
+        # Delete object and check it's marked as not alive. Refcounting frees
+        # it immediately on CPython; other implementations need a collection.
+        finalizer = weakref.finalize(test_obj, lambda: None)
         del test_obj
-        gc.collect()
+        if sys.implementation.name != "cpython":
+            gc.collect()
+        assert not finalizer.alive
         
-        tracked = self.profiler.get_tracked_objects()
+        tracked = profiler.get_tracked_objects()
         assert tracking_id in tracked
         assert tracked[tracking_id]['alive'] is False
     
-    def test_compare_snapshots(self):
+    def test_compare_snapshots(self, profiler, monkeypatch):
         """Test comparing snapshots."""
+        # Drive the profiler's clock instead of sleeping between snapshots
+        monkeypatch.setattr("glon.core.time.monotonic", FakeClock(step=0.1))
+        
         # Take two snapshots
-        self.profiler.take_snapshot("before")
-        time.sleep(0.1)  # Small delay
-        self.profiler.take_snapshot("after")
+        profiler.take_snapshot("before")
+        profiler.take_snapshot("after")
         
-        comparison = self.profiler.compare_snapshots(0, 1)
+        comparison = profiler.compare_snapshots(0, 1)
         
         required_keys = ['time_diff', 'rss_diff', 'vms_diff', 'objects_diff', 'label1', 'label2']
         for key in required_keys:
@@ -169,29 +259,53 @@ class TestMemoryProfiler:
         
         assert comparison['label1'] == "before"
         assert comparison['label2'] == "after"
-        assert comparison['time_diff'] > 0
+        assert comparison['time_diff'] == pytest.approx(0.1, abs=1e-6)
+    
+    def test_compare_snapshots_detailed(self, profiler):
+        """Test comparing snapshots that recorded object counts."""
+        profiler.take_snapshot("before", detailed=True)
+        profiler.take_snapshot("undetailed")
+        profiler.take_snapshot("after", detailed=True)
+        
+        assert isinstance(profiler.compare_snapshots(0, 2)['objects_diff'], int)
+        assert profiler.compare_snapshots(0, 1)['objects_diff'] is None
     
-    def test_compare_snapshots_invalid_index(self):
+    def test_compare_snapshots_invalid_index(self, profiler):
         """Test comparing snapshots with invalid indices."""
         with pytest.raises(IndexError):
-            self.profiler.compare_snapshots(0, 1)
+            profiler.compare_snapshots(0, 1)
     
-    def test_clear_snapshots(self):
+    @pytest.mark.parametrize("index1, index2", [(0, 2), (2, 0), (-3, 0), (0, -3), (10**6, 0)])
+    def test_compare_snapshots_out_of_range(self, profiler, index1, index2):
+        """Test that out-of-range indices raise before any snapshot is read."""
+        profiler.take_snapshot("first")
+        profiler.take_snapshot("second")
+        
+        with pytest.raises(IndexError, match="Snapshot index out of range"):
+            profiler.compare_snapshots(index1, index2)
+    
+    def test_compare_snapshots_negative_index(self, profiler):
+        """Test comparing snapshots counted from the end."""
+        profiler.take_snapshot("first")
+        profiler.take_snapshot("second")
+        
+        comparison = profiler.compare_snapshots(0, -1)
+        assert comparison['label1'] == "first"
+        assert comparison['label2'] == "second"
+    
+    def test_clear_snapshots(self, profiler):
         """Test clearing snapshots."""
-        self.profiler.take_snapshot("test")
-        assert len(self.profiler.snapshots) == 1
+        profiler.take_snapshot("test")
+        assert profiler.snapshot_count == 1
         
-        self.profiler.clear_snapshots()
-        assert len(self.profiler.snapshots) == 0
+        profiler.clear_snapshots()
+        assert profiler.snapshot_count == 0
     
-    def test_clear_tracking(self):
+    def test_clear_tracking(self, profiler):
         """Test clearing tracked objects."""
-        class TestObject:
-            pass
-        
-        test_obj = TestObject()  # Use custom class for weak reference
-        self.profiler.track_object(test_obj, "test")
-        assert len(self.profiler.weak_refs) == 1
+        test_obj = _TestObj()  # Use custom class for weak reference
+        profiler.track_object(test_obj, "test")
+        assert len(profiler.get_tracked_objects()) == 1
         
-        self.profiler.clear_tracking()
-        assert len(self.profiler.weak_refs) == 0
+        profiler.clear_tracking()
+        assert len(profiler.get_tracked_objects()) == 0
@@ -4,20 +4,11 @@ Tests for utility functions.
 
 import pytest
 import gc
+import itertools
 import tempfile
 import os
-from unittest.mock import patch, MagicMock
-from glon.utils import (
-    cleanup_temp_files,
-    monitor_memory_usage,
-    force_garbage_collection,
-    find_object_cycles,
-    get_object_size,
-    analyze_memory_usage,
-    set_debug_gc,
-    clear_gc_debug,
-    create_memory_logger
-)
+import time
+from unittest.mock import patch
 
 
 class TestCleanupTempFiles:
@@ -25,6 +16,8 @@ class TestCleanupTempFiles:
     
     def test_cleanup_temp_files(self):
         """Test cleaning up temporary files."""
+        from glon.utils import cleanup_temp_files
+        
         # Create a temporary file
         with tempfile.NamedTemporaryFile(delete=False) as temp_file:
             temp_path = temp_file.name
@@ -40,51 +33,127 @@ class TestCleanupTempFiles:
         assert not os.path.exists(temp_path)
         assert cleaned_count >= 1
     
-    def test_cleanup_temp_files_pattern(self):
+    @pytest.mark.parametrize("n", [1, 8, 64])
+    def test_cleanup_temp_files_pattern(self, n, tmp_path, monkeypatch):
         """Test cleaning up temporary files with pattern."""
-        # Create multiple temporary files with same pattern
-        temp_files = []
-        for i in range(3):
-            with tempfile.NamedTemporaryFile(
-                delete=False, 
-                prefix=f"test_pattern_{i}_"
-            ) as temp_file:
-                temp_path = temp_file.name
-                temp_file.write(b"test content")
-                temp_files.append(temp_path)
+        from glon.utils import cleanup_temp_files
+        
+        # Scan an isolated directory rather than the system temp dir
+        monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+        
+        # Create multiple files with same pattern, plus one that doesn't match
+        temp_files = [tmp_path / f"test_pattern_{i}_x" for i in range(n)]
+        for temp_path in temp_files:
+            temp_path.write_bytes(b"test content")
+        other_file = tmp_path / "unrelated"
+        other_file.write_bytes(b"test content")
         
         # Clean up files with pattern
         cleaned_count = cleanup_temp_files("test_pattern")
         
-        # All files should be cleaned up
+        # All matching files should be cleaned up
         for temp_path in temp_files:
-            assert not os.path.exists(temp_path)
+            assert not temp_path.exists()
+        assert other_file.exists()
+        
+        assert cleaned_count == n
+
+    def test_cleanup_temp_files_glob(self, tmp_path, monkeypatch):
+        """Test cleaning up temporary files with a glob pattern."""
+        from glon.utils import cleanup_temp_files
+        
+        monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+        temp_path = tmp_path / "test_glob_1.gltmp"
+        temp_path.write_bytes(b"test content")
+        other_file = tmp_path / "test_glob_1.txt"
+        other_file.write_bytes(b"test content")
+
+        cleaned_count = cleanup_temp_files("test_glob_*.gltmp")
+
+        assert not temp_path.exists()
+        assert other_file.exists()
+        assert cleaned_count == 1
+
+    def test_cleanup_temp_files_skips_symlinks(self, tmp_path, monkeypatch):
+        """Test that symlinks are neither followed nor removed."""
+        from glon.utils import cleanup_temp_files
         
-        assert cleaned_count == 3
+        temp_dir = tmp_path / "tmp"
+        temp_dir.mkdir()
+        monkeypatch.setattr(tempfile, "gettempdir", lambda: str(temp_dir))
+        target = tmp_path / "target"
+        target.write_bytes(b"test content")
+        link = temp_dir / "test_link"
+        link.symlink_to(target)
+
+        cleaned_count = cleanup_temp_files("test_link")
+
+        assert link.is_symlink()
+        assert target.exists()
+        assert cleaned_count == 0
 
 
 class TestMonitorMemoryUsage:
     """Test cases for monitor_memory_usage function."""
     
-    @patch('glon.utils.psutil')
-    def test_monitor_memory_usage(self, mock_psutil):
+    def test_monitor_memory_usage(self, psutil_process_mock, monkeypatch):
         """Test memory usage monitoring."""
-        # Mock psutil.Process
-        mock_process = MagicMock()
-        mock_process.memory_info.return_value = MagicMock(rss=1000000, vms=2000000)
-        mock_process.memory_percent.return_value = 50.0
-        mock_psutil.Process.return_value = mock_process
-        mock_psutil.os.getpid.return_value = 1234
-        
-        # Mock time.sleep to avoid actual delay
-        with patch('glon.utils.time.sleep'):
+        from glon.utils import monitor_memory_usage
+        
+        monkeypatch.setattr("glon.utils._PROCESS", psutil_process_mock)
+        
+        # Patch the clock of the module under test so the loop never blocks
+        assert monitor_memory_usage.__module__ == 'glon.utils'
+        started = time.perf_counter()
+        with patch('glon.utils.time.sleep') as mock_sleep, \
+                patch('glon.utils.time.monotonic', side_effect=itertools.count(0, 0.01)):
             samples = monitor_memory_usage(duration=2, interval=0.1)
+        elapsed = time.perf_counter() - started
         
-        assert len(samples) >= 20  # Should have at least 20 samples
+        assert elapsed < 0.5
+        assert mock_sleep.called
+        assert all(args[0] > 0 for args, _ in mock_sleep.call_args_list)
+        assert len(samples) == 20
         assert all('timestamp' in sample for sample in samples)
         assert all('rss' in sample for sample in samples)
         assert all('vms' in sample for sample in samples)
         assert all('percent' in sample for sample in samples)
+        assert all('objects_count' not in sample for sample in samples)
+        assert all(sample['rss'] == 1000000 for sample in samples)
+
+    def test_monitor_memory_usage_detailed(self, psutil_process_mock, monkeypatch):
+        """Test opting in to tracked-object counts."""
+        from glon.utils import monitor_memory_usage
+        
+        monkeypatch.setattr("glon.utils._PROCESS", psutil_process_mock)
+
+        with patch('glon.utils.time.sleep'):
+            samples = monitor_memory_usage(duration=1, interval=0.5, detailed=True)
+
+        assert len(samples) == 2
+        assert all(isinstance(sample['objects_count'], int) for sample in samples)
+
+    def test_monitor_memory_usage_slow_samples(self, psutil_process_mock, monkeypatch):
+        """Test that slow samples skip missed deadlines and stop at duration."""
+        from glon.utils import monitor_memory_usage
+        
+        monkeypatch.setattr("glon.utils._PROCESS", psutil_process_mock)
+
+        # Every clock read advances 0.5s, far longer than the interval
+        with patch('glon.utils.time.sleep') as mock_sleep, \
+                patch('glon.utils.time.monotonic', side_effect=itertools.count(0, 0.5)):
+            samples = monitor_memory_usage(duration=2, interval=0.1)
+
+        mock_sleep.assert_not_called()
+        assert len(samples) == 1
+
+    @pytest.mark.parametrize("interval", [0, -1])
+    def test_monitor_memory_usage_invalid_interval(self, interval):
+        """Test that a non-positive interval is rejected."""
+        from glon.utils import monitor_memory_usage
+        
+        with pytest.raises(ValueError):
+            monitor_memory_usage(duration=1, interval=interval)
 
 
 class TestForceGarbageCollection:
@@ -92,8 +161,7 @@ class TestForceGarbageCollection:
     
     def test_force_garbage_collection(self):
         """Test forcing garbage collection."""
-        # Create some objects
-        objects = [[] for _ in range(100)]
+        from glon.utils import force_garbage_collection
         
         results = force_garbage_collection()
         
@@ -101,25 +169,31 @@ class TestForceGarbageCollection:
         expected_keys = ['gen_0', 'gen_1', 'gen_2']
         for key in expected_keys:
             assert key in results
-            assert 'collected' in results[key]
-            assert 'before_count' in results[key]
-            assert 'after_count' in results[key]
-            assert 'net_change' in results[key]
-        
-        # Check that collected counts are integers
-        for key in expected_keys:
             assert isinstance(results[key]['collected'], int)
-            assert isinstance(results[key]['before_count'], int)
-            assert isinstance(results[key]['after_count'], int)
-            assert isinstance(results[key]['net_change'], int)
+        
+        # Object counts are taken once around the whole sweep
+        for key in ['before_count', 'after_count', 'net_change']:
+            assert isinstance(results[key], int)
+        assert results['net_change'] == results['after_count'] - results['before_count']
     
     def test_force_garbage_collection_verbose(self):
         """Test forcing garbage collection with verbose output."""
+        from glon.utils import force_garbage_collection
+        
         with patch('builtins.print') as mock_print:
-            force_garbage_collection(verbose=True)
-            
-            # Check that print was called for each generation
-            assert mock_print.call_count == 3
+            results = force_garbage_collection(verbose=True)
+        
+        # One message per generation, returned rather than printed
+        mock_print.assert_not_called()
+        assert len(results['messages']) == 3
+        assert results['messages'][0].startswith("Generation 0: Collected ")
+    
+    def test_force_garbage_collection_quiet(self):
+        """Test that messages are only built in verbose mode."""
+        from glon.utils import force_garbage_collection
+        
+        results = force_garbage_collection()
+        assert 'messages' not in results
 
 
 class TestFindObjectCycles:
@@ -127,22 +201,92 @@ class TestFindObjectCycles:
     
     def test_find_object_cycles_no_cycle(self):
         """Test finding cycles when none exist."""
+        from glon.utils import find_object_cycles
+        
         obj = [1, 2, 3]
         cycles = find_object_cycles(obj)
         assert cycles == []
     
     def test_find_object_cycles_with_cycle(self):
         """Test finding cycles when they exist."""
+        from glon.utils import find_object_cycles
+        
         # Create a simple cycle
         a = []
         b = []
         a.append(b)
         b.append(a)
         
-        cycles = find_object_cycles(a)
-        # Should find at least one cycle
-        assert len(cycles) >= 1
+        # Bound the walk to the objects under test
+        cycles = find_object_cycles(a, max_depth=3)
+        # Should find exactly the one cycle
+        assert len(cycles) == 1
         assert all(isinstance(cycle, list) for cycle in cycles)
+        assert any(
+            any(o is a for o in cycle) and any(o is b for o in cycle)
+            for cycle in cycles
+        )
+
+    def test_find_object_cycles_self_reference(self):
+        """Test finding a cycle where an object refers to itself."""
+        from glon.utils import find_object_cycles
+        
+        a = []
+        a.append(a)
+
+        cycles = find_object_cycles(a)
+        assert len(cycles) == 1
+        assert cycles[0][0] is a
+
+    def test_find_object_cycles_weakrefable_objects(self):
+        """Test finding a cycle between weakly-referenceable objects."""
+        from glon.utils import find_object_cycles
+        
+        class Node:
+            __slots__ = ('other', '__weakref__')
+
+        a = Node()
+        b = Node()
+        a.other = b
+        b.other = a
+
+        cycles = find_object_cycles(a, max_depth=1)
+        assert len(cycles) == 1
+        assert cycles[0][0] is a
+        assert cycles[0][1] is b
+
+    @pytest.mark.parametrize("cycle_first", [True, False])
+    def test_find_object_cycles_shorter_path_found_later(self, cycle_first):
+        """Test that a cycle first reached near max_depth is still found."""
+        from glon.utils import find_object_cycles
+        
+        b = []
+        d = [b]
+        b.append(d)
+        # A longer path to b that reaches it near the depth limit
+        chain = b
+        for _ in range(9):
+            chain = [chain]
+        root = [b, chain] if cycle_first else [chain, b]
+        
+        cycles = find_object_cycles(root)
+        assert len(cycles) == 1
+        assert any(o is b for o in cycles[0])
+        assert any(o is d for o in cycles[0])
+
+    def test_find_object_cycles_deep_chain(self):
+        """Test that long acyclic chains don't hit the recursion limit."""
+        from glon.utils import find_object_cycles
+        
+        head = []
+        node = head
+        for _ in range(5000):
+            nxt = []
+            node.append(nxt)
+            node = nxt
+
+        cycles = find_object_cycles(head, max_depth=10000)
+        assert cycles == []
 
 
 class TestGetObjectSize:
@@ -150,6 +294,8 @@ class TestGetObjectSize:
     
     def test_get_object_size(self):
         """Test getting object size."""
+        from glon.utils import get_object_size
+        
         obj = [1, 2, 3, 4, 5]
         size = get_object_size(obj)
         assert isinstance(size, int)
@@ -157,6 +303,8 @@ class TestGetObjectSize:
     
     def test_get_object_size_empty(self):
         """Test getting size of empty object."""
+        from glon.utils import get_object_size
+        
         obj = []
         size = get_object_size(obj)
         assert isinstance(size, int)
@@ -166,37 +314,43 @@ class TestGetObjectSize:
 class TestAnalyzeMemoryUsage:
     """Test cases for analyze_memory_usage function."""
     
-    @patch('glon.utils.psutil')
-    def test_analyze_memory_usage(self, mock_psutil):
+    def test_analyze_memory_usage(self, psutil_process_mock, monkeypatch):
         """Test memory usage analysis."""
-        # Mock psutil.Process
-        mock_process = MagicMock()
-        mock_process.memory_info.return_value = MagicMock(rss=1000000, vms=2000000)
-        mock_process.memory_percent.return_value = 50.0
-        mock_psutil.Process.return_value = mock_process
-        mock_psutil.os.getpid.return_value = 1234
+        from glon.utils import analyze_memory_usage
         
+        monkeypatch.setattr("glon.utils._PROCESS", psutil_process_mock)
+        
+        # Snapshot gc state once; the analysis must report the same values
+        enabled = gc.isenabled()
+        threshold = gc.get_threshold()
         analysis = analyze_memory_usage()
+        assert analysis['gc']['enabled'] == enabled
+        assert analysis['gc']['threshold'] == threshold
         
         # Check structure
-        required_keys = ['timestamp', 'memory', 'gc', 'objects']
-        for key in required_keys:
-            assert key in analysis
+        expected = {'timestamp': float, 'memory': dict, 'gc': dict, 'objects': dict}
+        assert {key: type(analysis[key]) for key in expected} == expected
         
         # Check memory section
-        assert 'rss' in analysis['memory']
-        assert 'vms' in analysis['memory']
-        assert 'percent' in analysis['memory']
+        expected = {'rss': int, 'vms': int, 'percent': float}
+        assert {key: type(analysis['memory'][key]) for key in expected} == expected
         
         # Check gc section
-        assert 'enabled' in analysis['gc']
-        assert 'counts' in analysis['gc']
-        assert 'threshold' in analysis['gc']
-        assert 'stats' in analysis['gc']
+        expected = {'enabled': bool, 'counts': tuple, 'threshold': tuple, 'stats': list}
+        assert {key: type(analysis['gc'][key]) for key in expected} == expected
         
         # Check objects section
-        assert 'total_count' in analysis['objects']
-        assert 'top_types' in analysis['objects']
+        expected = {'total_count': int, 'top_types': list}
+        assert {key: type(analysis['objects'][key]) for key in expected} == expected
+
+    def test_analyze_memory_usage_without_psutil(self, monkeypatch):
+        """Test that a missing psutil is reported as an ImportError."""
+        from glon.utils import analyze_memory_usage
+        
+        monkeypatch.setattr("glon.utils._PROCESS", None)
+        
+        with pytest.raises(ImportError):
+            analyze_memory_usage()
 
 
 class TestDebugFunctions:
@@ -204,37 +358,76 @@ class TestDebugFunctions:
     
     def test_set_debug_gc(self):
         """Test setting debug flags."""
-        set_debug_gc(gc.DEBUG_STATS)
-        # Can't easily test the effect, but ensure no exception
-        clear_gc_debug()  # Clean up
+        from glon.utils import set_debug_gc
+        
+        original_flags = gc.get_debug()
+        try:
+            set_debug_gc(gc.DEBUG_STATS)
+            flags = gc.get_debug()
+            assert flags == gc.DEBUG_STATS
+        finally:
+            gc.set_debug(original_flags)
     
     def test_clear_gc_debug(self):
         """Test clearing debug flags."""
-        clear_gc_debug()
-        # Ensure no exception
+        from glon.utils import clear_gc_debug
+        
+        original_flags = gc.get_debug()
+        try:
+            clear_gc_debug()
+            flags = gc.get_debug()
+            assert flags == 0
+        finally:
+            gc.set_debug(original_flags)
 
 
 class TestMemoryLogger:
     """Test cases for memory logger creation."""
     
-    def test_create_memory_logger(self):
+    @pytest.fixture(autouse=True)
+    def _detach_handlers(self):
+        """Close handlers added to the shared "gc_memory" logger by a test."""
+        import logging
+        
+        logger = logging.getLogger("gc_memory")
+        yield
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+    
+    def test_create_memory_logger(self, tmp_path):
         """Test creating memory logger."""
-        logger = create_memory_logger("test_gc_memory.log")
+        from glon.utils import create_memory_logger
+        
+        log_file = tmp_path / "gc_memory.log"
+        logger = create_memory_logger(str(log_file))
         
         assert logger.name == "gc_memory"
         assert logger.level == 20  # INFO level
-        
-        # Clean up log file
-        if os.path.exists("test_gc_memory.log"):
-            os.remove("test_gc_memory.log")
+        assert log_file.exists()
     
-    def test_create_memory_logger_default(self):
+    def test_create_memory_logger_default(self, tmp_path, monkeypatch):
         """Test creating memory logger with default file."""
+        from glon.utils import create_memory_logger
+        
+        # The default log file is relative to the working directory
+        monkeypatch.chdir(tmp_path)
         logger = create_memory_logger()
         
         assert logger.name == "gc_memory"
         assert logger.level == 20  # INFO level
+        assert (tmp_path / "gc_memory.log").exists()
+    
+    def test_create_memory_logger_reuses_handler(self, tmp_path):
+        """Test that a second call doesn't open a file it won't use."""
+        from glon.utils import create_memory_logger
+        
+        first_file = tmp_path / "first.log"
+        second_file = tmp_path / "second.log"
+        
+        create_memory_logger(str(first_file))
+        logger = create_memory_logger(str(second_file))
         
-        # Clean up log file
-        if os.path.exists("gc_memory.log"):
-            os.remove("gc_memory.log")
+        assert len(logger.handlers) == 1
+        assert first_file.exists()
+        assert not second_file.exists()